@@ -12,6 +12,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.interpolate import Rbf
 from scipy.spatial import distance_matrix
+from shapely import contains_xy
+
+from utils.hotspots import find_hotspots
 
 # Load fire station locations from CSV
 weather_stations = pd.read_csv("all_fire_stations_in_area_fire.csv", skiprows=1)  # Skip the first row if needed
@@ -90,8 +93,26 @@ grid_gdf = gpd.GeoDataFrame(grid_points,
 # Clip heatmap to California borders
 clipped_grid = gpd.clip(grid_gdf, california)
 
-# Identify hottest point based on interpolated data
-hottest_point = clipped_grid.loc[clipped_grid['Temperature'].idxmax()]
+# Identify hottest points: search coarse-to-fine inside California
+# rather than taking the maximum of the 200x200 grid
+california_shape = california.geometry.union_all()
+
+
+def clipped_rbf(lon, lat):
+    """Interpolated temperature, NaN outside California."""
+    return np.where(contains_xy(california_shape, lon, lat), rbf(lon, lat), np.nan)
+
+
+hotspots = find_hotspots(clipped_rbf,
+                         (grid_lon.min(), grid_lon.max(), grid_lat.min(), grid_lat.max()),
+                         k=3, min_spacing=0.5)
+if len(hotspots):
+    hottest_point = {'Longitude': hotspots[0, 0], 'Latitude': hotspots[0, 1],
+                     'Temperature': hotspots[0, 2]}
+else:
+    # the coarse search found no point inside California, so fall back
+    # to the hottest point of the clipped 200x200 grid
+    hottest_point = clipped_grid.loc[clipped_grid['Temperature'].idxmax()]
 
 # Plot the map
 fig, ax = plt.subplots(figsize=(10, 12))
@@ -119,5 +140,7 @@ ax.legend(loc='lower left')
 # Print hottest point
 print(f"Most Probable Fire Start Location: ({hottest_point['Latitude']}, {hottest_point['Longitude']})")
 print(f"Temperature: {hottest_point['Temperature']} °F")
+for lon, lat, temp in hotspots[1:]:
+    print(f"Next hotspot: ({lat}, {lon}) at {temp} °F")
 
 plt.show()
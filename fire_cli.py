@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Headless command line entry point for the fire analysis steps.
+
+    python fire_cli.py interpolate stations.csv --out temps.npy
+    python fire_cli.py hotspots stations.csv -k 5 --out hotspots.csv
+    python fire_cli.py spread --wind 7.38 --direction -1 -1 --out final.npy
+    python fire_cli.py ensemble --temperatures temps.npy --out probability.npy
+
+stations.csv needs Longitude, Latitude and Temperature columns.
+Results are written to files (add --image for a PNG); nothing is shown
+on screen and nothing is fetched from the network. Heavy modules are
+only imported by the subcommand that needs them, so small invocations
+start quickly.
+"""
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+METHODS = ["barycentric", "cubic", "triangle_mean", "rbf", "rbf_augmented"]
+
+
+def _stations(path):
+    import pandas as pd
+
+    stations = pd.read_csv(path).dropna(
+        subset=["Longitude", "Latitude", "Temperature"])
+    return (stations[["Longitude", "Latitude"]].values,
+            stations["Temperature"].values)
+
+
+def _interpolant(args):
+    """Build the chosen interpolant and the grid bounds around the stations."""
+    from utils import interpolation
+
+    points, values = _stations(args.stations)
+    f = getattr(interpolation, args.method)(points, values)
+    bounds = (points[:, 0].min() - args.padding,
+              points[:, 0].max() + args.padding,
+              points[:, 1].min() - args.padding,
+              points[:, 1].max() + args.padding)
+    return f, bounds
+
+
+def _clip(f, boundary, region="California", name_column="name"):
+    """
+    Mask f to NaN outside a region of a local boundary file.
+
+    The boundary file (e.g. us-states.json) is filtered on name_column
+    to region, as the heatmap scripts do; pass region=None to use every
+    shape in the file.
+    """
+    if boundary is None:
+        return f
+
+    import geopandas as gpd
+    import numpy as np
+    import shapely
+
+    shapes = gpd.read_file(boundary).to_crs("EPSG:4326")
+    if region is not None:
+        if name_column not in shapes.columns:
+            columns = ", ".join(c for c in shapes.columns if c != "geometry")
+            raise SystemExit(f"No {name_column!r} column in {boundary} "
+                             f"(columns: {columns}); pass --name-column")
+        shapes = shapes[shapes[name_column] == region]
+        if shapes.empty:
+            raise SystemExit(f"No shape named {region!r} in {boundary}")
+    shape = shapes.geometry.union_all()
+    shapely.prepare(shape)
+
+    def clipped(x, y):
+        return np.where(shapely.contains_xy(shape, x, y), f(x, y), np.nan)
+
+    return clipped
+
+
+def _save_image(array, path, label):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    image = ax.imshow(array, cmap="coolwarm", interpolation="nearest",
+                      origin="lower")
+    fig.colorbar(image, ax=ax, label=label)
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+
+def _model():
+    sys.path.insert(0, os.path.join(HERE, "prototype-fire-model"))
+    import model_prototype
+
+    return model_prototype
+
+
+def _model_inputs(args):
+    """Grid, temperatures and params for the prototype fire model."""
+    import numpy as np
+
+    model = _model()
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    if args.temperatures:
+        # e.g. the output of interpolate; cells outside the clipped
+        # region (NaN) are treated as unburnable
+        temperatures = np.load(args.temperatures)
+        outside = np.isnan(temperatures)
+        temperatures = np.where(outside, 0, temperatures)
+    else:
+        temperatures = model.temperature_map(args.size, plot=False)
+        outside = np.zeros(temperatures.shape, dtype=bool)
+
+    rows, cols = temperatures.shape
+    grid = np.ones((rows, cols))
+    fuel = model.sample_fuel(
+        model.gaussian_intensity(max(rows, cols))[:rows, :cols],
+        cell_area=(10 / max(rows, cols)) ** 2)
+    grid[fuel == 1] = 4
+    grid[outside] = 0
+    row, col = args.ignition if args.ignition else (rows // 2, cols // 2)
+    grid[row][col] = 2
+
+    return model, grid, temperatures, [args.wind, list(args.direction)]
+
+
+def interpolate(args):
+    """Interpolate station temperatures onto a grid."""
+    import numpy as np
+
+    f, (x_min, x_max, y_min, y_max) = _interpolant(args)
+    f = _clip(f, args.boundary, args.region, args.name_column)
+    x_grid, y_grid = np.meshgrid(np.linspace(x_min, x_max, args.size),
+                                 np.linspace(y_min, y_max, args.size))
+    temperatures = np.asarray(f(x_grid, y_grid), dtype=float)
+
+    np.save(args.out, temperatures)
+    if args.image:
+        _save_image(temperatures, args.image, "Temperature (°F)")
+
+
+def hotspots(args):
+    """Find the k most probable fire starts."""
+    import pandas as pd
+
+    from utils.hotspots import find_hotspots
+
+    f, bounds = _interpolant(args)
+    f = _clip(f, args.boundary, args.region, args.name_column)
+    found = find_hotspots(f, bounds, k=args.k, min_spacing=args.min_spacing)
+    pd.DataFrame(found, columns=["Longitude", "Latitude", "Temperature"]
+                 ).to_csv(args.out, index=False)
+
+
+def spread(args):
+    """Run one fire spread realisation."""
+    import numpy as np
+
+    model, grid, temperatures, params = _model_inputs(args)
+    fire = model.FireModel(grid, temperatures, params,
+                           instrument=args.trace is not None)
+    fire.model_spread()
+
+    np.save(args.out, fire.get_final_state())
+    if args.trace:
+        fire.export_trace(args.trace)
+    if args.image:
+        _save_image(fire.get_final_state(), args.image, "Cell state")
+
+
+def ensemble(args):
+    """Estimate burn probability until it converges."""
+    import numpy as np
+
+    model, grid, temperatures, params = _model_inputs(args)
+    probability, runs, converged = model.burn_probability(
+        grid, temperatures, params, tol=args.tol, quantile=args.quantile,
+        max_runs=args.max_runs)
+
+    np.save(args.out, probability)
+    print(f"{runs} runs, {'converged' if converged else 'not converged'}")
+    if args.image:
+        _save_image(probability, args.image, "Burn probability")
+
+
+def parser():
+    """Build the argument parser."""
+    main = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = main.add_subparsers(dest="command", required=True)
+
+    for name, func in [("interpolate", interpolate), ("hotspots", hotspots)]:
+        sub = commands.add_parser(name, help=func.__doc__)
+        sub.set_defaults(func=func)
+        sub.add_argument("stations")
+        sub.add_argument("--method", choices=METHODS, default="barycentric")
+        sub.add_argument("--padding", type=float, default=0.1)
+        sub.add_argument("--boundary",
+                         help="local boundary file to clip to")
+        sub.add_argument("--region", default="California",
+                         help="name of the boundary shape to clip to "
+                              "(empty for all shapes)")
+        sub.add_argument("--name-column", default="name",
+                         help="boundary file column holding --region")
+
+    interp = commands.choices["interpolate"]
+    interp.add_argument("--size", type=int, default=200)
+    interp.add_argument("--out", default="temperatures.npy")
+    interp.add_argument("--image")
+
+    hot = commands.choices["hotspots"]
+    hot.add_argument("-k", type=int, default=1)
+    hot.add_argument("--min-spacing", type=float, default=0.5)
+    hot.add_argument("--out", default="hotspots.csv")
+
+    for name, func, out in [("spread", spread, "final_state.npy"),
+                            ("ensemble", ensemble, "burn_probability.npy")]:
+        sub = commands.add_parser(name, help=func.__doc__)
+        sub.set_defaults(func=func)
+        sub.add_argument("--size", type=int, default=200)
+        sub.add_argument("--temperatures",
+                         help="temperature grid (.npy, e.g. from "
+                              "interpolate); its shape overrides --size")
+        sub.add_argument("--wind", type=float, default=7.38)
+        sub.add_argument("--direction", type=float, nargs=2,
+                         default=[-1, -1])
+        sub.add_argument("--ignition", type=int, nargs=2,
+                         metavar=("ROW", "COL"))
+        sub.add_argument("--seed", type=int)
+        sub.add_argument("--out", default=out)
+        sub.add_argument("--image")
+
+    commands.choices["spread"].add_argument(
+        "--trace", help="write the per-step trace (.csv or .json)")
+
+    ens = commands.choices["ensemble"]
+    ens.add_argument("--tol", type=float, default=0.2)
+    ens.add_argument("--quantile", type=float, default=0.95)
+    ens.add_argument("--max-runs", type=int, default=500)
+
+    return main
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if getattr(args, "region", None) == "":
+        args.region = None
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
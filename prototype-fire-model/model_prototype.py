@@ -1,15 +1,16 @@
 """A prototype cellular automata fire spread model."""
 
+import csv
+import json
+import time
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 from collections import deque
-import matplotlib.animation as animation
 from copy import deepcopy
 from typing import List
-import pandas as pd
 # import random
 
+TRACE_FIELDS = ["step", "frontier", "draws", "ignited", "seconds"]
+
 
 class FireModel:
     """
@@ -22,8 +23,14 @@ class FireModel:
     """
 
     def __init__(self, grid: np.array,
-                 temperatures: np.array, params=[0, [0, 0]]):
-        """Initialise the fire model given a grid and wind parameters."""
+                 temperatures: np.array, params=[0, [0, 0]],
+                 step_callback=None, instrument=False):
+        """
+        Initialise the fire model given a grid and wind parameters.
+
+        step_callback - optional callable(model, stats) run after each step
+        instrument - record per-step stats in self.trace
+        """
         self.grid = np.array(grid)
         self.directions = [
             [0, 0],
@@ -41,6 +48,9 @@ class FireModel:
         self.steps = 0
         self.normalised_wind = 1/(1+np.exp(-self.params[0]))
         self.temperatures = temperatures
+        self.step_callback = step_callback
+        self.instrument = instrument
+        self.trace = []
 
     def wind_affect(self, direction):
         """
@@ -64,12 +74,17 @@ class FireModel:
         Saves snapshots of grid state.
         params - [windSpeed, direction]
 
+        If instrumented (or given a step callback), each step reports
+        the frontier size, random draws, cells ignited and time taken.
         """
         queue = deque()
         rows, cols = len(self.grid), len(self.grid[0])
         land = 0
         self.grid_states = []
         self.steps = 0
+        self.trace = []
+        record = self.instrument or self.step_callback is not None
+        step = 0
 
         for i in range(rows):
             for j in range(cols):
@@ -82,6 +97,12 @@ class FireModel:
 
             self.grid_states.append(deepcopy(self.grid))
 
+            if record:
+                start = time.perf_counter()
+                frontier = len(queue)
+                draws = 0
+                ignited = 0
+
             for _ in range(len(queue)):
                 row, col = queue.popleft()
                 self.grid[row][col] = 3
@@ -110,6 +131,8 @@ class FireModel:
 
                         num = np.random.choice([0, 1], 1,
                                                p=[1 - p, p])
+                        if record:
+                            draws += 1
 
                         if self.grid[next_i][next_j] == 4:
                             num = 1
@@ -121,11 +144,49 @@ class FireModel:
                             land -= 1
 
                             self.steps += 1
+                            if record:
+                                ignited += 1
+
+            if record:
+                stats = {"step": step, "frontier": frontier,
+                         "draws": draws, "ignited": ignited,
+                         "seconds": time.perf_counter() - start}
+                if self.instrument:
+                    self.trace.append(stats)
+                if self.step_callback is not None:
+                    self.step_callback(self, stats)
+            step += 1
 
         self.grid_states.append(deepcopy(self.grid))
 
+    def export_trace(self, path: str):
+        """
+        Write the per-step trace to a CSV or JSON file.
+
+        The format is picked from the file extension (.json, else CSV).
+        """
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(self.trace, file)
+            return
+
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=TRACE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.trace)
+
+    def trace_summary(self):
+        """Total the per-step trace (steps, draws, ignitions, time)."""
+        return summarise_trace(self.trace)
+
     def animate_spread(self, grid_states: List[np.ndarray], save_file: bool):
         """Animate fire spread based on grid snapshots."""
+        # matplotlib is only imported when plotting so that batch runs
+        # of the model don't pay for it
+        import matplotlib as mpl
+        import matplotlib.animation as animation
+        import matplotlib.pyplot as plt
+
         cmap = mpl.colors.ListedColormap(['blue',
                                           'white', 'red', 'orange', 'brown'])
 
@@ -153,46 +214,73 @@ class FireModel:
         return self.grid_states[-1]
 
 
-def sample_objects(n):
+def summarise_trace(trace):
     """
-    Generate 2-d homogeneous Poisson process realisations.
+    Total a list of per-step stats.
 
-    Utilises a simple Gaussian intensity function.
+    burn_probability uses this to report each run of an ensemble in
+    the same form as a single run.
     """
-    x_vals = np.linspace(-1, 1, n)
-    y_vals = np.linspace(-1, 1, n)
-    x_grid, y_grid = np.meshgrid(x_vals, y_vals)
+    return {
+        "steps": len(trace),
+        "max_frontier": max((s["frontier"] for s in trace), default=0),
+        "draws": sum(s["draws"] for s in trace),
+        "ignited": sum(s["ignited"] for s in trace),
+        "seconds": sum(s["seconds"] for s in trace),
+    }
 
-    # Flatten the grid and create DataFrame
-    grid_df = pd.DataFrame({
-        'x': x_grid.ravel(),
-        'y': y_grid.ravel()
-    })
 
-    # Compute the intensity function
-    grid_df['r'] = np.exp(-(grid_df['x']**2 + grid_df['y']**2)/2)
-    grid_df['lambda'] = grid_df['r']  # Intensity function
+def gaussian_intensity(n):
+    """Gaussian fuel intensity over an n x n grid spanning [-1, 1]^2."""
+    vals = np.linspace(-1, 1, n)
+    x_grid, y_grid = np.meshgrid(vals, vals)
+    return np.exp(-(x_grid**2 + y_grid**2)/2)
 
-    # Compute expectation
-    cell_area = (10 / n) ** 2  # Area of each grid cell
-    expected_total = np.sum(grid_df['lambda'] * cell_area)
 
-    # Sample the actual number of points from a Poisson distribution
-    n_sampled = np.random.poisson(expected_total)
-    print(n_sampled)
+def sample_fuel(intensity, cell_area=1.0, mode="poisson",
+                chunk_rows=1024, rng=None):
+    """
+    Sample a fuel mask from a spatial point process on the grid.
 
-    func = np.exp(-(x_grid**2 + y_grid**2)/2)
+    intensity - array of per-cell intensity, e.g. a fuel-density raster
+    mode - "poisson": a cell is fuel if its Poisson(intensity*cell_area)
+           count is non-zero, i.e. with probability 1 - exp(-mean)
+           "bernoulli": a cell is fuel with probability intensity
 
-    weights = func.flatten() / sum(func.flatten())
+    rng - optional np.random.Generator; defaults to the global
+          np.random state so np.random.seed controls it like the
+          rest of the model
 
-    sampled_points = np.random.choice(n*n, size=n_sampled,
-                                      p=weights, replace=False)
+    Rows are drawn in chunks so large grids don't need float
+    temporaries the size of the whole grid.
+    Returns a uint8 mask (1 = fuel) with the shape of intensity.
+    """
+    rng = np.random if rng is None else rng
+    intensity = np.asarray(intensity)
+    mask = np.empty(intensity.shape, dtype=np.uint8)
 
-    sampled_rows, sampled_cols = np.unravel_index(sampled_points, (n, n))
+    for start in range(0, intensity.shape[0], chunk_rows):
+        block = intensity[start:start + chunk_rows]
+        if mode == "poisson":
+            p = -np.expm1(-block*cell_area)
+        elif mode == "bernoulli":
+            p = np.clip(block, 0, 1)
+        else:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        mask[start:start + chunk_rows] = rng.random(block.shape) < p
 
-    positions = np.array(list(zip(sampled_rows, sampled_cols)))
+    return mask
 
-    return positions
+
+def sample_objects(n):
+    """
+    Generate 2-d Poisson process realisations.
+
+    Utilises a simple Gaussian intensity function.
+    Returns the (row, col) positions of the sampled cells.
+    """
+    mask = sample_fuel(gaussian_intensity(n), cell_area=(10 / n) ** 2)
+    return np.argwhere(mask)
 
 
 def fire_heatmap(states):
@@ -201,6 +289,9 @@ def fire_heatmap(states):
 
     takes an List of np arrays
     """
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+
     sum_array = np.sum(states, axis=0)
 
     normalised_arr = sum_array/np.max(sum_array)
@@ -215,7 +306,50 @@ def fire_heatmap(states):
     plt.show()
 
 
-def temperature_map(n):
+def burn_probability(grid, temperatures, params, tol=0.2, quantile=0.95,
+                     min_runs=20, max_runs=500, z=1.96, summaries=None):
+    """
+    Estimate per-cell burn probability, stopping once it has converged.
+
+    Keeps a running count of how often each cell burns and the width
+    of its Wilson score interval, which unlike the normal approximation
+    is not zero when a cell has always or never burned. Stops when the
+    given quantile of the widths (1.0 = worst cell) falls below tol,
+    after at least min_runs and at most max_runs. Only cells that can
+    burn (flammable land) or have burned are counted, so rivers and
+    fuel don't make the estimate look converged.
+
+    If a summaries list is given, each run is instrumented and its
+    summarise_trace totals are appended to it.
+    Returns the burn frequency array, the number of runs used and
+    whether it converged before max_runs.
+    """
+    burnable = np.asarray(grid) == 1
+    burnt = np.zeros(np.shape(grid))
+    runs = 0
+    converged = False
+
+    while runs < max_runs:
+        model = FireModel(grid, temperatures, params,
+                          instrument=summaries is not None)
+        model.model_spread()
+        burnt += model.get_final_state() == 3
+        if summaries is not None:
+            summaries.append(model.trace_summary())
+        runs += 1
+
+        if runs >= min_runs:
+            p = burnt[burnable | (burnt > 0)] / runs
+            width = 2*z/(1 + z**2/runs)*np.sqrt(
+                p*(1 - p)/runs + z**2/(4*runs**2))
+            if len(p) == 0 or np.quantile(width, quantile) < tol:
+                converged = True
+                break
+
+    return burnt / runs, runs, converged
+
+
+def temperature_map(n, plot=True):
     """Generate temperature grid."""
     xgrid = np.linspace(-5, 5, n)
     ygrid = np.linspace(-5, 5, n)
@@ -224,7 +358,9 @@ def temperature_map(n):
     # z = np.abs(np.sin(0.5* np.pi*x)*np.sin(0.5* np.pi*y) + 2*np.cos(1/6 * np.pi*y*x))
     z = 600*np.exp(-(1/2)*(x**2 + y**2)/9)
     normz = z / np.max(z)
-    plt.imshow(normz, cmap="coolwarm", interpolation="nearest")
+    if plot:
+        import matplotlib.pyplot as plt
+        plt.imshow(normz, cmap="coolwarm", interpolation="nearest")
 
     return normz
 
@@ -250,8 +386,8 @@ if __name__ == "__main__":
 
     temperatures = temperature_map(n)
 
-    for i in sample_objects(n):
-        grid[i[0]][i[1]] = 4
+    fuel = sample_fuel(gaussian_intensity(n), cell_area=(10 / n) ** 2)
+    grid[fuel == 1] = 4
 
     # generate_boundary(n, grid)
 
@@ -261,14 +397,14 @@ if __name__ == "__main__":
     test.model_spread()
     test.animate_spread(test.grid_states, False)
 
-    states = []
-    for i in range(100):
-        test = FireModel(grid, temperatures, [7.38, [-1, -1]])
-        test.model_spread()
-
-        states.append(test.get_final_state())
+    probability, runs, converged = burn_probability(
+        grid, temperatures, [7.38, [-1, -1]], max_runs=100)
+    if converged:
+        print(f"Burn probability converged after {runs} runs")
+    else:
+        print(f"Burn probability did not converge in {runs} runs")
 
-    fire_heatmap(states)
+    fire_heatmap([probability])
 # Also need to add temperature, fuel, accurate locations for trees/ rivers.
 
 # DATE,PRECIPITATION,MAX_TEMP,MIN_TEMP,AVG_WIND_SPEED,FIRE_START_DAY,YEAR,TEMP_RANGE,WIND_TEMP_RATIO,MONTH,SEASON,LAGGED_PRECIPITATION,LAGGED_AVG_WIND_SPEED,DAY_OF_YEAR
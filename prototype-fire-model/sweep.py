@@ -0,0 +1,203 @@
+"""
+Ignition x weather parameter sweeps over the prototype fire model.
+
+Every combination of an ignition point and a params setting is a
+scenario. Scenarios are run across a process pool and each result is
+written to its own compressed .npz file in the store directory, with
+an index.csv listing what has been done. Re-running a sweep against
+the same store skips scenarios already listed in the index; if the
+index is missing or unreadable it is rebuilt from the result files.
+"""
+
+import csv
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from model_prototype import FireModel, burn_probability
+
+INDEX_FIELDS = ["scenario", "mode", "row", "col", "wind", "dx", "dy",
+                "runs"]
+
+logger = logging.getLogger(__name__)
+
+_grid = None
+_temperatures = None
+
+
+def latlon_to_cell(lat, lon, bounds, shape):
+    """
+    Map a latitude/longitude to a (row, col) grid cell.
+
+    bounds - (lon_min, lon_max, lat_min, lat_max) covered by the grid
+    """
+    lon_min, lon_max, lat_min, lat_max = bounds
+    rows, cols = shape
+    row = round((lat - lat_min) / (lat_max - lat_min) * (rows - 1))
+    col = round((lon - lon_min) / (lon_max - lon_min) * (cols - 1))
+    return min(max(row, 0), rows - 1), min(max(col, 0), cols - 1)
+
+
+def load_ignitions(path, bounds=None, shape=None):
+    """
+    Read an ignition table from CSV.
+
+    Accepts either row/col columns or Latitude/Longitude columns (as
+    printed by the heatmap scripts), which need the grid bounds and
+    shape to be converted to cells.
+    """
+    table = pd.read_csv(path)
+    if {"row", "col"} <= set(table.columns):
+        return list(zip(table["row"].astype(int), table["col"].astype(int)))
+
+    return [latlon_to_cell(lat, lon, bounds, shape)
+            for lat, lon in zip(table["Latitude"], table["Longitude"])]
+
+
+def arrival_time(grid_states):
+    """Step at which each cell first caught fire, -1 if it never did."""
+    arrival = np.full(np.shape(grid_states[0]), -1, dtype=np.int32)
+    for step, state in enumerate(grid_states):
+        arrival[(arrival < 0) & (state == 2)] = step
+    return arrival
+
+
+def scenario_id(ignition, params, mode="probability"):
+    """Stable name for one ignition/params/mode combination."""
+    (row, col), (wind, (dx, dy)) = ignition, params
+    return f"{mode}_r{row}_c{col}_w{wind:g}_d{dx:g}_{dy:g}"
+
+
+def scenario_seed(seed, name):
+    """
+    Seed for one scenario, derived from the sweep seed and its name.
+
+    Scenarios get independent random streams whichever worker runs
+    them, and re-running a sweep with the same seed reproduces them.
+    """
+    sequence = np.random.SeedSequence([seed, *name.encode()])
+    return int(sequence.generate_state(1)[0])
+
+
+def _init_worker(grid, temperatures):
+    global _grid, _temperatures
+    _grid = grid
+    _temperatures = temperatures
+
+
+def _run_scenario(store, ignition, params, mode, max_runs, seed):
+    """Run one scenario in a worker and write its result file."""
+    name = scenario_id(ignition, params, mode)
+    # the model draws from the global state, which forked workers
+    # would otherwise all inherit from the parent
+    np.random.seed(scenario_seed(seed, name))
+    grid = np.array(_grid)
+    grid[ignition[0]][ignition[1]] = 2
+
+    if mode == "arrival":
+        model = FireModel(grid, _temperatures, params)
+        model.model_spread()
+        result, runs = arrival_time(model.grid_states), 1
+    else:
+        result, runs, _ = burn_probability(grid, _temperatures, params,
+                                           max_runs=max_runs)
+
+    (row, col), (wind, (dx, dy)) = ignition, params
+    entry = {"scenario": name, "mode": mode, "row": row, "col": col,
+             "wind": wind, "dx": dx, "dy": dy, "runs": runs}
+
+    # write to a temporary file first so an interrupted sweep never
+    # leaves a half-written result that looks finished; the index
+    # entry is stored alongside so the index can be rebuilt
+    tmp = os.path.join(store, name + ".tmp.npz")
+    np.savez_compressed(tmp, result=result, **entry)
+    os.replace(tmp, os.path.join(store, name + ".npz"))
+    return entry
+
+
+def _read_index(index_path):
+    """The index as a DataFrame, or None if missing or unreadable."""
+    try:
+        index = pd.read_csv(index_path)
+    except (FileNotFoundError, pd.errors.EmptyDataError,
+            pd.errors.ParserError):
+        return None
+    return index if list(index.columns) == INDEX_FIELDS else None
+
+
+def _rebuild_index(store, index_path):
+    """Rewrite the index from the entries stored in the result files."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(store, "*.npz"))):
+        if path.endswith(".tmp.npz"):
+            continue
+        with np.load(path) as data:
+            if "scenario" in data.files:
+                entries.append({k: data[k].item() for k in INDEX_FIELDS})
+
+    index = pd.DataFrame(entries, columns=INDEX_FIELDS)
+    index.to_csv(index_path, index=False)
+    return index
+
+
+def run_sweep(grid, temperatures, ignitions, param_sets, store,
+              mode="probability", max_runs=100, workers=None, seed=0):
+    """
+    Run every ignition x params scenario and store the results.
+
+    ignitions - list of (row, col) cells
+    param_sets - list of FireModel params, e.g. [7.38, [-1, -1]]
+    mode - "probability" for burn probability, "arrival" for
+           first-ignition step of a single realisation
+    seed - sweep seed; each scenario's stream is derived from it
+
+    A scenario that raises is logged and left out of the index, so a
+    re-run will retry it.
+    Returns the index of completed scenarios as a DataFrame.
+    """
+    os.makedirs(store, exist_ok=True)
+    index_path = os.path.join(store, "index.csv")
+
+    # a sweep killed before its first result can leave an empty or
+    # partial index, which would otherwise block every resume
+    index = _read_index(index_path)
+    if index is None:
+        index = _rebuild_index(store, index_path)
+    done = set(index["scenario"])
+
+    todo = [(ignition, params)
+            for ignition, params in product(ignitions, param_sets)
+            if scenario_id(ignition, params, mode) not in done]
+
+    with open(index_path, "a", newline="") as file, \
+            ProcessPoolExecutor(max_workers=workers,
+                                initializer=_init_worker,
+                                initargs=(grid, temperatures)) as pool:
+        writer = csv.DictWriter(file, fieldnames=INDEX_FIELDS)
+
+        futures = {pool.submit(_run_scenario, store, ignition, params,
+                               mode, max_runs, seed):
+                   scenario_id(ignition, params, mode)
+                   for ignition, params in todo}
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except Exception:
+                logger.exception("Scenario %s failed", futures[future])
+                continue
+            writer.writerow(row)
+            file.flush()
+
+    return pd.read_csv(index_path)
+
+
+def load_result(store, ignition, params, mode="probability"):
+    """Load the stored result array for one scenario."""
+    name = scenario_id(ignition, params, mode)
+    with np.load(os.path.join(store, name + ".npz")) as data:
+        return data["result"]
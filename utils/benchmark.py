@@ -0,0 +1,151 @@
+"""
+Speed and accuracy benchmark for the station-to-grid interpolation methods.
+
+Usage: python -m utils.benchmark stations.csv [grid_size]
+
+stations.csv needs Longitude, Latitude and Temperature columns for a
+single day. Every method is run on the same input; accuracy is the
+leave-one-out error at the stations.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import Delaunay
+
+from utils.interpolation import (barycentric, cubic, rbf, rbf_augmented,
+                                 triangle_mean)
+
+
+def loo_refit(build, points, values):
+    """Leave-one-out predictions by refitting without each station."""
+    predictions = np.empty(len(points))
+    for i in range(len(points)):
+        others = np.arange(len(points)) != i
+        f = build(points[others], values[others])
+        predictions[i] = f(points[i, 0], points[i, 1])
+    return predictions
+
+
+def loo_star(points, values, combine):
+    """
+    Leave-one-out predictions for the Delaunay methods.
+
+    Removing a station only re-triangulates the polygon formed by its
+    neighbours, so each prediction triangulates just those neighbours.
+    combine(weights, vertex_values) gives the value inside a triangle.
+    Stations on the hull have no prediction (NaN).
+    """
+    tri = Delaunay(points)
+    indptr, indices = tri.vertex_neighbor_vertices
+    predictions = np.full(len(points), np.nan)
+
+    for i in range(len(points)):
+        neighbours = indices[indptr[i]:indptr[i + 1]]
+        if len(neighbours) < 3:
+            continue
+        local = Delaunay(points[neighbours])
+        simplex = local.find_simplex(points[i])
+        if simplex < 0:
+            continue
+        transform = local.transform[simplex]
+        b = transform[:2] @ (points[i] - transform[2])
+        weights = np.append(b, 1 - b.sum())
+        predictions[i] = combine(weights,
+                                 values[neighbours[local.simplices[simplex]]])
+    return predictions
+
+
+def loo_rbf(points, values, smooth=0.3):
+    """
+    Leave-one-out predictions for the station Rbf in one solve.
+
+    Uses Rippa's formula: the error at station i is c_i / (A^-1)_ii,
+    with the shape parameter held at its full-data value.
+    """
+    f = rbf(points, values, smooth=smooth)
+    inverse = np.linalg.inv(f.A)
+    return values - f.nodes / np.diag(inverse)
+
+
+METHODS = {
+    "cubic": (cubic, lambda p, v: loo_refit(cubic, p, v)),
+    "barycentric": (barycentric,
+                    lambda p, v: loo_star(p, v, lambda w, t: w @ t)),
+    "triangle_mean": (triangle_mean,
+                      lambda p, v: loo_star(p, v, lambda w, t: t.mean())),
+    "rbf": (rbf, loo_rbf),
+    "rbf_augmented": (rbf_augmented,
+                      lambda p, v: loo_refit(rbf_augmented, p, v)),
+}
+
+
+def benchmark(points, values, grid_size=200, methods=METHODS):
+    """
+    Time, measure and score each interpolation method.
+
+    Returns a DataFrame with build time, evaluation time per million
+    grid cells, peak memory and leave-one-out RMSE/MAE per method.
+    The Delaunay methods can't predict hull stations, so the *_common
+    columns score every method on the stations all of them predict,
+    which is the like-for-like comparison.
+    """
+    points = np.asarray(points, dtype=float)
+    values = np.asarray(values, dtype=float)
+    x_grid, y_grid = np.meshgrid(
+        np.linspace(points[:, 0].min(), points[:, 0].max(), grid_size),
+        np.linspace(points[:, 1].min(), points[:, 1].max(), grid_size))
+
+    rows = []
+    errors_by_method = {}
+    for name, (build, loo) in methods.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        f = build(points, values)
+        built = time.perf_counter()
+        f(x_grid, y_grid)
+        evaluated = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        start_loo = time.perf_counter()
+        errors = loo(points, values) - values
+        loo_time = time.perf_counter() - start_loo
+        errors_by_method[name] = errors
+
+        rows.append({
+            "method": name,
+            "build_s": built - start,
+            "eval_s_per_million": (evaluated - built) / grid_size**2 * 1e6,
+            "peak_mb": peak / 2**20,
+            "loo_rmse": np.sqrt(np.nanmean(errors**2)),
+            "loo_mae": np.nanmean(np.abs(errors)),
+            "loo_stations": int(np.sum(~np.isnan(errors))),
+            "loo_s": loo_time,
+        })
+
+    results = pd.DataFrame(rows).set_index("method")
+
+    common = np.all([~np.isnan(e) for e in errors_by_method.values()],
+                    axis=0)
+    results["loo_rmse_common"] = [np.sqrt(np.mean(e[common]**2))
+                                  for e in errors_by_method.values()]
+    results["loo_mae_common"] = [np.mean(np.abs(e[common]))
+                                 for e in errors_by_method.values()]
+    results["common_stations"] = int(common.sum())
+    return results
+
+
+if __name__ == "__main__":
+    stations = pd.read_csv(sys.argv[1]).dropna(
+        subset=["Longitude", "Latitude", "Temperature"])
+    # the Delaunay methods can't use stations sharing a location
+    stations = stations.drop_duplicates(subset=["Longitude", "Latitude"])
+    grid_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(benchmark(stations[["Longitude", "Latitude"]].values,
+                    stations["Temperature"].values, grid_size)
+          .to_string(float_format="%.4g"))
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def suppress(points, values, k, min_spacing):
+    """
+    Greedy non-maximum suppression.
+
+    Takes points in the format [[x, y], ..] with a value for each.
+    Returns the indices of up to k highest points that are all
+    at least min_spacing apart.
+    """
+    keep = []
+    for i in np.argsort(values)[::-1]:
+        if np.isnan(values[i]):
+            continue
+        if all(np.hypot(*(points[i] - points[j])) >= min_spacing
+               for j in keep):
+            keep.append(i)
+            if len(keep) == k:
+                break
+    return keep
+
+
+def find_hotspots(func, bounds, k=1, min_spacing=0.5, coarse=50,
+                  refine=11, levels=3, candidates=None):
+    """
+    Find the k highest, well separated points of an interpolant.
+
+    func - vectorised f(x, y), returning NaN outside the domain
+    bounds - (x_min, x_max, y_min, y_max)
+
+    Evaluates func on a coarse x coarse grid, then repeatedly zooms in
+    on a refine x refine window around each promising cell, so only
+    small patches are evaluated at high resolution.
+    Returns up to k [x, y, value] rows, hottest first.
+    """
+    if refine < 3:
+        raise ValueError("refine must be at least 3 to zoom in")
+
+    x_min, x_max, y_min, y_max = bounds
+    xs = np.linspace(x_min, x_max, coarse)
+    ys = np.linspace(y_min, y_max, coarse)
+    x_grid, y_grid = np.meshgrid(xs, ys)
+    values = np.asarray(func(x_grid, y_grid), dtype=float).ravel()
+    points = np.column_stack([x_grid.ravel(), y_grid.ravel()])
+
+    # take extra candidates since the coarse maxima may not survive
+    # refinement in the same order
+    candidates = 4*k if candidates is None else candidates
+    dx = (x_max - x_min) / (coarse - 1)
+    dy = (y_max - y_min) / (coarse - 1)
+    start = suppress(points, values, candidates, min_spacing / 2)
+
+    refined = []
+    for i in start:
+        (x, y), best = points[i], values[i]
+        half_x, half_y = dx, dy
+        for _ in range(levels):
+            # keep each window inside bounds so results can't escape
+            x_grid, y_grid = np.meshgrid(
+                np.linspace(max(x - half_x, x_min), min(x + half_x, x_max),
+                            refine),
+                np.linspace(max(y - half_y, y_min), min(y + half_y, y_max),
+                            refine))
+            local = np.asarray(func(x_grid, y_grid), dtype=float)
+            if np.all(np.isnan(local)):
+                break
+            j = np.nanargmax(local)
+            if local.flat[j] >= best:
+                x, y, best = x_grid.flat[j], y_grid.flat[j], local.flat[j]
+            half_x /= (refine - 1) / 2
+            half_y /= (refine - 1) / 2
+        refined.append([x, y, best])
+
+    refined = np.array(refined).reshape(-1, 3)
+    keep = suppress(refined[:, :2], refined[:, 2], k, min_spacing)
+    return refined[keep]
@@ -0,0 +1,217 @@
+import numpy as np
+from scipy.interpolate import (CloughTocher2DInterpolator,
+                               LinearNDInterpolator, Rbf)
+from scipy.spatial import Delaunay
+
+
+def cubic(points, values):
+    """Piecewise cubic interpolant, as used by griddata(method='cubic')."""
+    return CloughTocher2DInterpolator(points, values)
+
+
+def barycentric(points, values):
+    """Linear interpolation inside each Delaunay triangle."""
+    return LinearNDInterpolator(points, values)
+
+
+def triangle_mean(points, values):
+    """Mean of the three station values over each Delaunay triangle."""
+    tri = Delaunay(points)
+    means = np.append(np.asarray(values)[tri.simplices].mean(axis=1), np.nan)
+
+    def evaluate(x, y):
+        simplex = tri.find_simplex(np.stack([x, y], axis=-1))
+        return means[simplex]
+
+    return evaluate
+
+
+def rbf(points, values, smooth=0.3):
+    """Multiquadric Rbf through the stations only."""
+    return Rbf(points[:, 0], points[:, 1], values,
+               function="multiquadric", smooth=smooth)
+
+
+def augment(points, values, border_expansion=0.5):
+    """
+    Add exaggerated midpoints and border ghost points to the stations.
+
+    Vectorised version of the point construction in
+    CA_temp_spread_heatmapV3.py.
+    """
+    points, values = np.asarray(points), np.asarray(values)
+    i, j = np.triu_indices(len(points), k=1)
+    mid_points = (points[i] + points[j]) / 2
+    mid_values = (values[i] + values[j]) / 2 + 0.2*(values[i] - values[j])
+
+    offsets = border_expansion*np.array([[0, 1], [0, -1], [1, 0], [-1, 0]])
+    ghost_points = (points[:, None, :] + offsets).reshape(-1, 2)
+    ghost_values = np.repeat(values, 4)
+
+    return (np.concatenate([points, mid_points, ghost_points]),
+            np.concatenate([values, mid_values, ghost_values]))
+
+
+def rbf_augmented(points, values, smooth=0.3):
+    """Multiquadric Rbf through stations, midpoints and ghost points."""
+    return rbf(*augment(points, values), smooth=smooth)
+
+
+class IncrementalInterpolator:
+    """
+    Barycentric (linear Delaunay) interpolation onto a regular grid.
+
+    Keeps the triangulation, each grid cell's triangle and barycentric
+    weights, and which cells touch each station, so that a new reading
+    only recomputes the cells in that station's triangles.
+
+    Stations are identified by the id they were given when added
+    (their row in the initial points), which stays fixed as other
+    stations are inserted or removed.
+    """
+
+    def __init__(self, points, values, bounds, shape):
+        """
+        Triangulate the stations and interpolate the whole grid.
+
+        points - station coordinates in the format [[x, y], ..]
+        bounds - (x_min, x_max, y_min, y_max) of the grid
+        shape - (rows, cols) of the grid
+        """
+        self.points = [np.asarray(p, dtype=float) for p in points]
+        self.values = [float(v) for v in values]
+        self.alive = list(range(len(self.points)))
+        self.bounds = bounds
+        self.shape = shape
+
+        x_min, x_max, y_min, y_max = bounds
+        rows, cols = shape
+        grid_x, grid_y = np.meshgrid(np.linspace(x_min, x_max, cols),
+                                     np.linspace(y_min, y_max, rows))
+        self.cells = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+
+        n_cells = len(self.cells)
+        self.cell_vertices = np.full((n_cells, 3), -1)
+        self.weights = np.zeros((n_cells, 3))
+        self.grid_values = np.full(n_cells, np.nan)
+
+        self.tri = self._triangulate()
+        self.triangles = self._simplices(self.tri)
+        self.vertex_cells = {}
+        self._locate(np.arange(n_cells))
+
+    def grid(self):
+        """Interpolated values as a (rows, cols) array, NaN outside."""
+        return self.grid_values.reshape(self.shape)
+
+    def set_value(self, station, value):
+        """Change one station's reading and update its cells."""
+        self.values[station] = float(value)
+        self._evaluate(self.vertex_cells.get(station, np.empty(0, int)))
+
+    def add_station(self, point, value):
+        """Insert a station, re-locating only the cells it affects."""
+        self.points.append(np.asarray(point, dtype=float))
+        self.values.append(float(value))
+        self.alive.append(len(self.points) - 1)
+        self._retriangulate()
+        return len(self.points) - 1
+
+    def remove_station(self, station):
+        """Remove a station, re-locating only the cells it affected."""
+        self.alive.remove(station)
+        self._retriangulate()
+
+    def _triangulate(self):
+        return Delaunay(np.array([self.points[i] for i in self.alive]))
+
+    def _simplices(self, tri):
+        """Triangles of tri as sets of station ids."""
+        ids = np.array(self.alive)[tri.simplices]
+        return {frozenset(s) for s in ids.tolist()}
+
+    def _retriangulate(self):
+        old = self.triangles
+        self.tri = self._triangulate()
+        new = self.triangles = self._simplices(self.tri)
+
+        # cells in triangles that no longer exist must be re-located
+        stale = np.zeros(len(self.cells), dtype=bool)
+        for key in old - new:
+            for station in key:
+                cells = self.vertex_cells.get(station, np.empty(0, int))
+                stale[cells] = True
+
+        # as must any cell covered by a new triangle, since it may
+        # previously have been outside the hull
+        for key in new - old:
+            stale[self._cells_in_box(np.array([self.points[i]
+                                               for i in key]))] = True
+
+        self._locate(np.flatnonzero(stale))
+
+    def _cells_in_box(self, corners):
+        """Flat indices of grid cells in the bounding box of corners."""
+        x_min, x_max, y_min, y_max = self.bounds
+        rows, cols = self.shape
+        dx = (x_max - x_min) / (cols - 1)
+        dy = (y_max - y_min) / (rows - 1)
+
+        c0 = max(int(np.floor((corners[:, 0].min() - x_min) / dx)), 0)
+        c1 = min(int(np.ceil((corners[:, 0].max() - x_min) / dx)), cols - 1)
+        r0 = max(int(np.floor((corners[:, 1].min() - y_min) / dy)), 0)
+        r1 = min(int(np.ceil((corners[:, 1].max() - y_min) / dy)), rows - 1)
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, int)
+
+        r, c = np.meshgrid(np.arange(r0, r1 + 1), np.arange(c0, c1 + 1),
+                           indexing="ij")
+        return (r*cols + c).ravel()
+
+    def _locate(self, cells):
+        """Find the triangle and weights for cells, then evaluate them."""
+        if len(cells) == 0:
+            return
+
+        old_vertices = self.cell_vertices[cells]
+
+        simplex = self.tri.find_simplex(self.cells[cells])
+        inside = simplex >= 0
+        transform = self.tri.transform[simplex[inside]]
+        b = np.einsum("ijk,ik->ij", transform[:, :2],
+                      self.cells[cells[inside]] - transform[:, 2])
+
+        vertices = np.full((len(cells), 3), -1)
+        vertices[inside] = np.array(self.alive)[
+            self.tri.simplices[simplex[inside]]]
+        weights = np.zeros((len(cells), 3))
+        weights[inside] = np.column_stack([b, 1 - b.sum(axis=1)])
+
+        self.cell_vertices[cells] = vertices
+        self.weights[cells] = weights
+        self._reindex(cells, old_vertices, vertices)
+        self._evaluate(cells)
+
+    def _reindex(self, cells, old_vertices, vertices):
+        """Move cells between the per-station cell lists."""
+        moved = np.any(old_vertices != vertices, axis=1)
+        cells = cells[moved]
+        old_vertices, vertices = old_vertices[moved], vertices[moved]
+
+        for station in np.unique(old_vertices[old_vertices >= 0]):
+            leaving = cells[np.any(old_vertices == station, axis=1)]
+            self.vertex_cells[station] = np.setdiff1d(
+                self.vertex_cells[station], leaving, assume_unique=True)
+
+        for station in np.unique(vertices[vertices >= 0]):
+            joining = cells[np.any(vertices == station, axis=1)]
+            self.vertex_cells[station] = np.union1d(
+                self.vertex_cells.get(station, np.empty(0, int)), joining)
+
+    def _evaluate(self, cells):
+        vertices = self.cell_vertices[cells]
+        inside = vertices[:, 0] >= 0
+        values = np.array(self.values)
+        self.grid_values[cells] = np.nan
+        self.grid_values[cells[inside]] = np.sum(
+            self.weights[cells[inside]] * values[vertices[inside]], axis=1)
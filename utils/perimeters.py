@@ -0,0 +1,171 @@
+"""
+Spatial index over the California fire perimeters.
+
+Answers "which earlier fires overlap this one" and "how many times has
+this area burned" with an STRtree over the projected polygons instead
+of intersecting every pair. Reading and projecting the GeoJSON is the
+slow part, so the projected geometries can be saved and reloaded.
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+# California Albers, in metres
+CA_CRS = "EPSG:3310"
+
+_index = None
+
+
+def fire_order(attributes):
+    """
+    Rank of each fire in time; fire j is earlier than i if rank[j] < rank[i].
+
+    Orders by ALARM_DATE, falling back to the start of YEAR_ where the
+    date is missing, with ties broken by row so that fires on the
+    same date still have an order.
+    """
+    n = len(attributes)
+    dates = pd.Series(pd.NaT, index=attributes.index,
+                      dtype="datetime64[ns, UTC]")
+    if "ALARM_DATE" in attributes:
+        dates = pd.to_datetime(attributes["ALARM_DATE"], errors="coerce",
+                               utc=True)
+    if "YEAR_" in attributes:
+        years = attributes["YEAR_"].astype("Int64").astype(str)
+        years = pd.to_datetime(years, format="%Y", errors="coerce", utc=True)
+        dates = dates.fillna(years)
+
+    keys = dates.to_numpy(dtype="datetime64[ns]").astype("int64")
+    # missing dates (NaT) sort as the oldest value; keep them first
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), keys))] = np.arange(n)
+    return rank
+
+
+class PerimeterIndex:
+    """STRtree over fire perimeters with their attributes."""
+
+    def __init__(self, geometries, attributes):
+        """
+        Build the tree.
+
+        geometries - array of projected shapely polygons
+        attributes - DataFrame with a row per geometry (YEAR_, ALARM_DATE, ..)
+        """
+        self.geometries = np.asarray(geometries)
+        self.attributes = attributes.reset_index(drop=True)
+        self.rank = fire_order(self.attributes)
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries)
+
+    @classmethod
+    def from_file(cls, path, crs=CA_CRS):
+        """Read perimeters (e.g. the GeoJSON) and project them."""
+        import geopandas as gpd
+
+        perimeters = gpd.read_file(path)
+        perimeters = perimeters[perimeters.geometry.notna()].to_crs(crs)
+        perimeters["geometry"] = perimeters.geometry.make_valid()
+        attributes = pd.DataFrame(perimeters.drop(columns="geometry"))
+        return cls(perimeters.geometry.values, attributes)
+
+    def save(self, path):
+        """Persist the projected geometries and attributes."""
+        with open(path, "wb") as file:
+            pickle.dump({"wkb": shapely.to_wkb(self.geometries),
+                         "attributes": self.attributes}, file)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index; the tree itself is rebuilt."""
+        with open(path, "rb") as file:
+            saved = pickle.load(file)
+        return cls(shapely.from_wkb(saved["wkb"]), saved["attributes"])
+
+    def _pool(self, workers):
+        return ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_init_worker,
+                                   initargs=(self,))
+
+    def overlaps(self, i):
+        """
+        Earlier fires overlapping fire i.
+
+        Returns a DataFrame of the earlier fires' rows with the
+        overlap area (in CRS units, m^2 by default).
+        """
+        candidates = self.tree.query(self.geometries[i],
+                                     predicate="intersects")
+        candidates = candidates[self.rank[candidates] < self.rank[i]]
+        areas = shapely.area(shapely.intersection(
+            self.geometries[candidates], self.geometries[i]))
+
+        result = self.attributes.iloc[candidates].copy()
+        result["overlap_area"] = areas
+        return result
+
+    def overlap_pairs(self, chunk=2000, workers=None):
+        """
+        All (later, earlier) pairs of overlapping fires.
+
+        Queries the tree in bulk, one chunk of fires per worker.
+        Returns a DataFrame with later, earlier and overlap_area columns.
+        """
+        chunks = [(start, min(start + chunk, len(self.geometries)))
+                  for start in range(0, len(self.geometries), chunk)]
+        with self._pool(workers) as pool:
+            parts = list(pool.map(_overlap_chunk, chunks))
+        return pd.concat(parts, ignore_index=True)
+
+    def reburn_raster(self, bounds, shape, chunk_rows=64, workers=None):
+        """
+        Count how many perimeters cover each cell of a grid.
+
+        bounds - (x_min, x_max, y_min, y_max) in the index CRS
+        shape - (rows, cols), e.g. the FireModel grid
+        Returns an int array of burn counts with the given shape.
+        """
+        rows = shape[0]
+        chunks = [(start, min(start + chunk_rows, rows), bounds, shape)
+                  for start in range(0, rows, chunk_rows)]
+        with self._pool(workers) as pool:
+            parts = list(pool.map(_reburn_chunk, chunks))
+        return np.concatenate(parts)
+
+
+def _init_worker(index):
+    global _index
+    _index = index
+
+
+def _overlap_chunk(args):
+    start, stop = args
+    queries, found = _index.tree.query(_index.geometries[start:stop],
+                                       predicate="intersects")
+    later = queries + start
+    earlier_mask = _index.rank[found] < _index.rank[later]
+    later, found = later[earlier_mask], found[earlier_mask]
+
+    areas = shapely.area(shapely.intersection(_index.geometries[later],
+                                              _index.geometries[found]))
+    return pd.DataFrame({"later": later, "earlier": found,
+                         "overlap_area": areas})
+
+
+def _reburn_chunk(args):
+    start, stop, bounds, shape = args
+    x_min, x_max, y_min, y_max = bounds
+    rows, cols = shape
+    xs = np.linspace(x_min, x_max, cols)
+    ys = np.linspace(y_min, y_max, rows)[start:stop]
+    x_grid, y_grid = np.meshgrid(xs, ys)
+
+    points = shapely.points(x_grid.ravel(), y_grid.ravel())
+    cells, _ = _index.tree.query(points, predicate="within")
+    counts = np.bincount(cells, minlength=len(points))
+    return counts.reshape(stop - start, cols)
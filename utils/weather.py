@@ -0,0 +1,121 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+WEATHER_FILES = [
+    "original data/CA_Weather_Fire_Dataset_1984-2025.csv",
+    "original data/CA_Weather (cleaned up) 1984-2023.csv",
+]
+
+RAW_COLUMNS = ["PRECIPITATION", "MAX_TEMP", "MIN_TEMP", "AVG_WIND_SPEED",
+               "FIRE_START_DAY"]
+
+SEASONS = pd.CategoricalDtype(["Winter", "Spring", "Summer", "Fall"])
+
+# month -> season, as used in the source datasets
+MONTH_SEASON = np.array([None, "Winter", "Winter", "Spring", "Spring",
+                         "Spring", "Summer", "Summer", "Summer", "Fall",
+                         "Fall", "Fall", "Winter"])
+
+# days in the lagged precipitation / wind speed windows
+LAG_WINDOW = 7
+
+
+def read_weather_csv(path):
+    """
+    Read one weather CSV into the raw columns, indexed by date.
+
+    The 1984-2025 file uses ISO dates while the cleaned up 1984-2023
+    file uses day/month/year, newest first.
+    """
+    frame = pd.read_csv(path)
+    iso = frame["DATE"].str.match(r"\d{4}-").all()
+    frame["DATE"] = pd.to_datetime(frame["DATE"], dayfirst=not iso,
+                                   format="ISO8601" if iso else "mixed")
+
+    frame = frame.set_index("DATE").sort_index()[RAW_COLUMNS]
+    frame["FIRE_START_DAY"] = frame["FIRE_START_DAY"].astype(bool)
+    return frame.astype({c: "float64" for c in RAW_COLUMNS[:-1]})
+
+
+def add_features(raw):
+    """
+    Compute the derived columns from the raw daily columns.
+
+    The lagged columns are trailing 7 day windows (precipitation
+    summed, wind speed averaged), matching the source datasets.
+    """
+    frame = raw.copy()
+    frame["TEMP_RANGE"] = frame["MAX_TEMP"] - frame["MIN_TEMP"]
+    frame["WIND_TEMP_RATIO"] = frame["AVG_WIND_SPEED"] / frame["MAX_TEMP"]
+
+    window = frame.rolling(LAG_WINDOW, min_periods=1)
+    frame["LAGGED_PRECIPITATION"] = window["PRECIPITATION"].sum()
+    frame["LAGGED_AVG_WIND_SPEED"] = window["AVG_WIND_SPEED"].mean()
+
+    dates = frame.index
+    frame["YEAR"] = dates.year.astype("int16")
+    frame["MONTH"] = dates.month.astype("int8")
+    frame["DAY_OF_YEAR"] = dates.dayofyear.astype("int16")
+    frame["SEASON"] = pd.Categorical(MONTH_SEASON[dates.month],
+                                     dtype=SEASONS)
+    return frame
+
+
+def _sources(paths):
+    """The source files and their modification times, in order."""
+    return [(os.path.abspath(p), os.path.getmtime(p)) for p in paths]
+
+
+def _read_cache(cache):
+    try:
+        return pd.read_pickle(cache)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def load_weather(paths=WEATHER_FILES, cache="working data/weather.pkl"):
+    """
+    Load the weather datasets as one typed, date indexed frame.
+
+    Rows from earlier paths take priority where dates overlap.
+    The result is cached as a pickle along with the source paths and
+    their modification times, and only reused if both still match.
+    """
+    sources = _sources(paths)
+    if cache:
+        cached = _read_cache(cache)
+        if isinstance(cached, dict) and cached.get("sources") == sources:
+            return cached["frame"]
+
+    raw = read_weather_csv(paths[0])
+    for path in paths[1:]:
+        raw = raw.combine_first(read_weather_csv(path))
+    raw["FIRE_START_DAY"] = raw["FIRE_START_DAY"].astype(bool)
+
+    frame = add_features(raw)
+    if cache:
+        pd.to_pickle({"sources": sources, "frame": frame}, cache)
+    return frame
+
+
+def append_days(frame, new_days, cache=None):
+    """
+    Append new daily rows, computing features for the new rows only.
+
+    new_days - frame of raw columns indexed by date, after frame's end
+    Only the last LAG_WINDOW - 1 days of history are needed to fill
+    the lagged windows of the new rows.
+    If cache is given the extended frame is written back to it, keeping
+    the sources it was loaded from so load_weather keeps reusing it.
+    """
+    context = frame[RAW_COLUMNS].iloc[-(LAG_WINDOW - 1):]
+    tail = add_features(pd.concat([context, new_days[RAW_COLUMNS]]))
+    frame = pd.concat([frame, tail.iloc[len(context):]])
+    if cache:
+        cached = _read_cache(cache)
+        sources = cached.get("sources") if isinstance(cached, dict) else None
+        pd.to_pickle({"sources": sources, "frame": frame}, cache)
+    return frame